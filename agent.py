@@ -1,9 +1,10 @@
 import re
 from datetime import datetime
 import streamlit as st 
-from langchain_groq import ChatGroq
 from tools import web_search_tool, weather_tool
 from prompts import REACT_PROMPT, FOLLOW_UP_PROMPT
+from router import ModelRouter, is_valid_decision, is_valid_final_answer
+import scaling
 from typing import Optional
 
 # ---------------- Environment & LLM ---------------- #
@@ -20,12 +21,39 @@ if not OPENWEATHER_API_KEY:
 if not TAVILY_API_KEY:
     raise ValueError("Missing TAVILY_API_KEY in Streamlit secrets")
 
-# Initialize Groq LLM
-llm = ChatGroq(
-    model_name="llama-3.3-70b-versatile",
-    temperature=0.3,
-    groq_api_key=GROQ_API_KEY
-)
+# Initialize Groq LLM tiers (8B instant first, escalating to 70B)
+router = ModelRouter(GROQ_API_KEY, temperature=0.3)
+
+# ---------------- Shared Cache & Rate-Limit Tier ---------------- #
+
+# Installed by scaling.py in pool workers; None keeps single-process behaviour.
+tool_cache = None
+rate_limiter = None
+
+def configure_shared_tier(cache, limiter) -> None:
+    """Route tool and LLM calls through a cache and rate limiter shared by all workers."""
+    global tool_cache, rate_limiter
+    tool_cache = cache
+    rate_limiter = limiter
+    router.rate_limiter = limiter
+
+def call_tool(service: str, tool_fn, tool_input: str, api_key: str) -> str:
+    """Run a tool through the shared cache and rate limiter, if installed."""
+    return scaling.call_tool(service, tool_fn, tool_input, api_key,
+                             cache=tool_cache, limiter=rate_limiter)
+
+def invoke_llm(prompt, validate=None) -> str:
+    """Invoke the model router, reusing cached completions across workers."""
+    cache_key = f"groq:{prompt}"
+    if tool_cache is not None:
+        cached = tool_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    response, valid = router.invoke(prompt, validate=validate)
+    # Replies that failed validation on every tier should be retried, not shared
+    if tool_cache is not None and valid:
+        tool_cache.set(cache_key, response)
+    return response
 
 # ---------------- Helper Functions ---------------- #
 
@@ -81,18 +109,18 @@ def run_agent(query: str) -> str:
         city = extract_city(query)
         if city:
             print(f"🌤️ Fetching weather for: {city}")
-            return weather_tool(city, api_key=OPENWEATHER_API_KEY)
+            return call_tool("openweather", weather_tool, city, OPENWEATHER_API_KEY)
         return "🌍 Please specify a valid city for weather information. Example: 'What's the weather in Paris?'"
 
     if is_web_searchable(query):
         print(f"🔍 Performing web search for: {query}")
-        return web_search_tool(query, api_key=TAVILY_API_KEY)
+        return call_tool("tavily", web_search_tool, query, TAVILY_API_KEY)
 
     # --- Fallback to LLM reasoning ---
     print(f"🧠 User Query (LLM fallback): {query}")
     try:
         formatted_prompt = REACT_PROMPT.format(user_query=query)
-        response = llm.invoke(formatted_prompt).content.strip()
+        response = invoke_llm(formatted_prompt, validate=is_valid_decision)
         print(f"🤖 Agent Thought: {response}")
 
         # --- Direct Answer ---
@@ -108,9 +136,9 @@ def run_agent(query: str) -> str:
             # Dispatch tool
             tool_name_lower = tool_name.lower()
             if "search" in tool_name_lower:
-                observation = web_search_tool(tool_input, api_key=TAVILY_API_KEY)
+                observation = call_tool("tavily", web_search_tool, tool_input, TAVILY_API_KEY)
             elif "weather" in tool_name_lower:
-                observation = weather_tool(tool_input, api_key=OPENWEATHER_API_KEY)
+                observation = call_tool("openweather", weather_tool, tool_input, OPENWEATHER_API_KEY)
             else:
                 return f"❌ Unknown tool: {tool_name}. Available tools: Web Search, Weather"
 
@@ -119,7 +147,7 @@ def run_agent(query: str) -> str:
                 tool_name=tool_name,
                 observation=observation
             )
-            final_answer = llm.invoke(formatted_followup).content.strip()
+            final_answer = invoke_llm(formatted_followup, validate=is_valid_final_answer)
             if "Final Answer:" in final_answer:
                 return final_answer.split("Final Answer:")[-1].strip()
             return final_answer
@@ -0,0 +1,314 @@
+import re
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple
+from langchain_groq import ChatGroq
+from prompts import REACT_PROMPT, FOLLOW_UP_PROMPT
+
+# ---------------- Model Tiers ---------------- #
+
+# Cheapest first; the router escalates down this list. Prices are USD per 1M tokens.
+MODEL_TIERS = {
+    "small": {"model": "llama-3.1-8b-instant", "input_cost": 0.05, "output_cost": 0.08},
+    "large": {"model": "llama-3.3-70b-versatile", "input_cost": 0.59, "output_cost": 0.79},
+}
+
+# Keep at most this many latency samples per series so a long-running process stays bounded
+LATENCY_WINDOW = 1000
+
+# Hedges only count when the answer opens with them, so "Penguins are unable
+# to fly." or "I can't believe it's Canberra" still pass.
+HEDGE_PATTERN = re.compile(
+    r"^\W*(sorry,?\s*)?("
+    r"i (don't|do not) know|i('m| am) not (sure|certain)|"
+    r"i (can't|cannot) (answer|help|provide|determine|say)|i('m| am) unable to|"
+    r"i (don't|do not) have (enough |any )?(information|data|access)|"
+    r"not enough information|as an ai\b"
+    r")"
+)
+
+
+def is_confident(answer: str) -> bool:
+    """Cheap confidence check: non-empty and not opening with a hedge."""
+    answer_lower = answer.lower().strip()
+    return bool(answer_lower) and not HEDGE_PATTERN.match(answer_lower)
+
+
+def is_valid_decision(response: str) -> bool:
+    """ReAct reply parses into a confident answer or a known tool call."""
+    if "Final Answer:" in response:
+        return is_confident(response.split("Final Answer:")[-1])
+    if "Action:" in response and "Action Input:" in response:
+        tool_name = response.split("Action:")[1].split("\n")[0].lower()
+        tool_input = response.split("Action Input:")[1].strip()
+        return bool(tool_input) and ("search" in tool_name or "weather" in tool_name)
+    return False
+
+
+def is_valid_final_answer(response: str) -> bool:
+    """Follow-up reply uses the Final Answer format and doesn't hedge."""
+    return "Final Answer:" in response and is_confident(response.split("Final Answer:")[-1])
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+# ---------------- Router ---------------- #
+
+class ModelRouter:
+    """Holds one ChatGroq client per tier and escalates when a reply fails validation."""
+
+    def __init__(self, api_key: str = None, tiers: dict = None, temperature: float = 0.3,
+                 clients: dict = None, rate_limiter=None):
+        self.tiers = tiers or MODEL_TIERS
+        self.clients = clients or {
+            name: ChatGroq(model_name=cfg["model"], temperature=temperature, groq_api_key=api_key)
+            for name, cfg in self.tiers.items()
+        }
+        self.rate_limiter = rate_limiter
+        self._reset_metrics()
+
+    def _reset_metrics(self) -> None:
+        self.metrics = {
+            name: {"calls": 0, "latencies": deque(maxlen=LATENCY_WINDOW),
+                   "input_tokens": 0, "output_tokens": 0, "cost": 0.0}
+            for name in self.tiers
+        }
+        # Wall time per invoke(), summed across tiers when a request escalates
+        self.request_latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.escalations = 0
+
+    def _record(self, tier: str, latency: float, message) -> None:
+        stats = self.metrics[tier]
+        usage = getattr(message, "response_metadata", {}).get("token_usage", {})
+        input_tokens = usage.get("prompt_tokens", 0)
+        output_tokens = usage.get("completion_tokens", 0)
+        stats["calls"] += 1
+        stats["latencies"].append(latency)
+        stats["input_tokens"] += input_tokens
+        stats["output_tokens"] += output_tokens
+        stats["cost"] += (input_tokens * self.tiers[tier]["input_cost"]
+                          + output_tokens * self.tiers[tier]["output_cost"]) / 1_000_000
+
+    def invoke(self, prompt, validate: Optional[Callable[[str], bool]] = None) -> Tuple[str, bool]:
+        """Try tiers from cheapest up until a reply passes validate.
+
+        Returns (response, valid); when no tier passes, the last tier's reply
+        is returned with valid=False.
+        """
+        names = list(self.tiers)
+        response, valid = "", False
+        request_start = time.perf_counter()
+        for i, tier in enumerate(names):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire("groq")
+            start = time.perf_counter()
+            message = self.clients[tier].invoke(prompt)
+            self._record(tier, time.perf_counter() - start, message)
+            response = message.content.strip()
+
+            valid = validate is None or validate(response)
+            if valid:
+                break
+            if i < len(names) - 1:
+                self.escalations += 1
+                print(f"⬆️ Escalating from {tier} model: reply failed validation")
+
+        self.requests += 1
+        self.request_latencies.append(time.perf_counter() - request_start)
+        return response, valid
+
+    def raw_metrics(self) -> dict:
+        """Picklable copy of the counters, for merging across worker processes."""
+        return {
+            "tiers": {
+                tier: {**stats, "model": self.tiers[tier]["model"],
+                       "latencies": list(stats["latencies"])}
+                for tier, stats in self.metrics.items()
+            },
+            "request_latencies": list(self.request_latencies),
+            "requests": self.requests,
+            "escalations": self.escalations,
+        }
+
+    def take_metrics(self) -> dict:
+        """Return raw_metrics() and reset the counters."""
+        raw = self.raw_metrics()
+        self._reset_metrics()
+        return raw
+
+    def summary(self) -> dict:
+        """Per-tier and end-to-end call counts, p50/p95 latency (ms) and estimated cost (USD)."""
+        return summarize_metrics(self.raw_metrics())
+
+
+def merge_metrics(raw_list) -> dict:
+    """Combine raw_metrics() from several routers, e.g. one per pool worker."""
+    merged = {"tiers": {}, "request_latencies": [], "requests": 0, "escalations": 0}
+    for raw in raw_list:
+        for tier, stats in raw["tiers"].items():
+            total = merged["tiers"].setdefault(tier, {
+                "model": stats["model"], "calls": 0, "latencies": [],
+                "input_tokens": 0, "output_tokens": 0, "cost": 0.0,
+            })
+            for field in ("calls", "input_tokens", "output_tokens", "cost"):
+                total[field] += stats[field]
+            total["latencies"].extend(stats["latencies"])
+        merged["request_latencies"].extend(raw["request_latencies"])
+        merged["requests"] += raw["requests"]
+        merged["escalations"] += raw["escalations"]
+    return merged
+
+
+def summarize_metrics(raw: dict) -> dict:
+    """Turn raw metrics into per-tier and overall p50/p95 latency (ms) and cost (USD)."""
+    report = {}
+    for tier, stats in raw["tiers"].items():
+        report[tier] = {
+            "model": stats["model"],
+            "calls": stats["calls"],
+            "p50_ms": _percentile(stats["latencies"], 50) * 1000,
+            "p95_ms": _percentile(stats["latencies"], 95) * 1000,
+            "cost_usd": stats["cost"],
+        }
+    report["overall"] = {
+        "requests": raw["requests"],
+        "p50_ms": _percentile(raw["request_latencies"], 50) * 1000,
+        "p95_ms": _percentile(raw["request_latencies"], 95) * 1000,
+        "cost_usd": sum(stats["cost"] for stats in raw["tiers"].values()),
+    }
+    report["escalations"] = raw["escalations"]
+    return report
+
+
+def print_summary(report: dict) -> None:
+    """Print a summarize_metrics() report as a small table."""
+    overall = report["overall"]
+    print(f"  {'total':>5} {'per request':<26} calls={overall['requests']:<3} "
+          f"p50={overall['p50_ms']:.0f}ms p95={overall['p95_ms']:.0f}ms "
+          f"cost=${overall['cost_usd']:.5f}")
+    for tier in MODEL_TIERS:
+        if tier in report:
+            stats = report[tier]
+            print(f"  {tier:>5} {stats['model']:<26} calls={stats['calls']:<3} "
+                  f"p50={stats['p50_ms']:.0f}ms p95={stats['p95_ms']:.0f}ms "
+                  f"cost=${stats['cost_usd']:.5f}")
+    print(f"  escalations: {report['escalations']}")
+
+# ---------------- Offline Eval ---------------- #
+
+# (query, expected substring) pairs that go down the LLM path in agent.run_agent
+EVAL_SET = [
+    ("Capital of Australia?", "canberra"),
+    ("How many legs does a spider have?", "8"),
+    ("Who wrote Romeo and Juliet?", "shakespeare"),
+    ("Square root of 144?", "12"),
+    ("Translate 'good morning' into French", "bonjour"),
+    ("Convert 100 Fahrenheit to Celsius", "37"),
+    ("Name the largest planet in our solar system", "jupiter"),
+    ("Opposite of 'ancient'?", "modern"),
+]
+
+# (query, expected decision) for the ReAct tool-selection step, sent straight to
+# the router so run_agent's keyword routes don't short-circuit them.
+# "search" / "weather" expect an Action line, "final" a direct Final Answer.
+DECISION_EVAL_SET = [
+    ("Who won the most recent FIFA World Cup?", "search"),
+    ("Current price of Bitcoin in USD", "search"),
+    ("Latest news about the James Webb Space Telescope", "search"),
+    ("Is it cold in Oslo right now?", "weather"),
+    ("How hot is it in Dubai at the moment?", "weather"),
+    ("What's 15% of 80?", "final"),
+    ("Define photosynthesis in one sentence", "final"),
+]
+
+# (tool_name, recorded observation, expected substring) for the follow-up
+# summarization step, using tool output in the same format tools.py returns.
+SUMMARY_EVAL_SET = [
+    ("Weather",
+     "The current weather in Paris is Light rain with 14.2°C temperature.",
+     "14.2"),
+    ("Weather",
+     "The current weather in Tokyo is Clear sky with 27.5°C temperature.",
+     "clear"),
+    ("Web Search",
+     "**Python 3.13 released** - Python 3.13.0 was released on October 7, 2024 with a "
+     "new interactive interpreter and an experimental free-threaded build.\n"
+     "🔗 https://www.python.org/downloads/release/python-3130/\n\n"
+     "**What's new in Python 3.13** - Highlights include an improved REPL, colored "
+     "tracebacks and an experimental JIT compiler.\n"
+     "🔗 https://docs.python.org/3/whatsnew/3.13.html\n\n"
+     "**Python 3.13 free-threading** - The optional build disables the GIL.\n"
+     "🔗 https://peps.python.org/pep-0703/",
+     "october 7"),
+    ("Web Search",
+     "**Acme Corp names new CEO** - Acme Corp appointed Jane Rivera as chief executive "
+     "on Monday, replacing Tom Hale after eight years.\n🔗 https://example.com/acme-ceo\n\n"
+     "**Who is Jane Rivera?** - Rivera previously ran Acme's logistics division.\n"
+     "🔗 https://example.com/rivera-profile\n\n"
+     "**Acme shares rise** - The stock rose 3% after the announcement.\n"
+     "🔗 https://example.com/acme-stock",
+     "jane rivera"),
+]
+
+
+def _decision_of(response: str) -> str:
+    if "Final Answer:" in response:
+        return "final"
+    if "Action:" in response:
+        tool_name = response.split("Action:")[1].split("\n")[0].lower()
+        for tool in ("search", "weather"):
+            if tool in tool_name:
+                return tool
+    return "invalid"
+
+
+def run_eval(agent_module) -> dict:
+    """Run all eval sets, returning accuracy per step plus router metrics.
+
+    ``answers`` goes end to end through run_agent; ``decisions`` and
+    ``summaries`` call the router directly with the ReAct and follow-up prompts.
+    """
+    router = agent_module.router
+    answers = sum(expected in agent_module.run_agent(query).lower()
+                  for query, expected in EVAL_SET)
+    decisions = 0
+    for query, expected in DECISION_EVAL_SET:
+        response, _ = router.invoke(REACT_PROMPT.format(user_query=query),
+                                    validate=is_valid_decision)
+        decisions += _decision_of(response) == expected
+    summaries = 0
+    for tool_name, observation, expected in SUMMARY_EVAL_SET:
+        response, _ = router.invoke(FOLLOW_UP_PROMPT.format(tool_name=tool_name,
+                                                            observation=observation),
+                                    validate=is_valid_final_answer)
+        summaries += expected in response.split("Final Answer:")[-1].lower()
+
+    report = router.summary()
+    report["accuracy"] = {
+        "answers": answers / len(EVAL_SET),
+        "decisions": decisions / len(DECISION_EVAL_SET),
+        "summaries": summaries / len(SUMMARY_EVAL_SET),
+    }
+    return report
+
+
+if __name__ == "__main__":
+    import agent
+
+    # Baseline: large model only, as before tiering
+    agent.router = ModelRouter(agent.GROQ_API_KEY, tiers={"large": MODEL_TIERS["large"]})
+    baseline = run_eval(agent)
+    agent.router = ModelRouter(agent.GROQ_API_KEY)
+    tiered = run_eval(agent)
+
+    for label, report in [("70B only", baseline), ("tiered", tiered)]:
+        accuracy = report["accuracy"]
+        print(f"\n📊 {label}: answers {accuracy['answers']:.0%}, "
+              f"decisions {accuracy['decisions']:.0%}, summaries {accuracy['summaries']:.0%}")
+        print_summary(report)
@@ -0,0 +1,412 @@
+import os
+import sys
+import time
+import json
+import hashlib
+import functools
+import uuid
+import argparse
+import multiprocessing as mp
+from typing import Optional
+
+# ---------------- Shared Store Backends ---------------- #
+
+# Requests per minute allowed across *all* workers, per upstream service.
+DEFAULT_LIMITS = {
+    "groq": int(os.getenv("GROQ_RPM", "30")),
+    "tavily": int(os.getenv("TAVILY_RPM", "60")),
+    "openweather": int(os.getenv("OPENWEATHER_RPM", "60")),
+}
+DEFAULT_CACHE_TTL = int(os.getenv("AGENT_CACHE_TTL", "300"))
+
+
+class LocalSharedStore:
+    """Key/value store in local shared memory (multiprocessing Manager).
+
+    The proxies are picklable, so one store created by the supervisor can be
+    handed to every worker process in the pool. Expired keys are swept out
+    every ``sweep_interval`` seconds so a long-running pool doesn't leak.
+    """
+
+    def __init__(self, manager=None, sweep_interval: int = 30):
+        manager = manager or mp.Manager()
+        self._data = manager.dict()
+        self._lock = manager.Lock()
+        self._sweep_interval = sweep_interval
+        self._next_sweep = time.time() + sweep_interval
+
+    def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at and expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key: str, value, ttl: int = 0) -> None:
+        self._maybe_sweep()
+        expires_at = time.time() + ttl if ttl else 0
+        self._data[key] = (expires_at, value)
+
+    def incr(self, key: str, ttl: int = 0, amount: int = 1) -> int:
+        """Atomically add ``amount`` to a counter and return the new value."""
+        self._maybe_sweep()
+        with self._lock:
+            now = time.time()
+            entry = self._data.get(key)
+            if entry is None or (entry[0] and entry[0] < now):
+                expires_at, count = (now + ttl if ttl else 0), amount
+            else:
+                # Keep the original expiry so windows still roll over
+                expires_at, count = entry[0], entry[1] + amount
+            self._data[key] = (expires_at, count)
+            return count
+
+    def sweep(self, now: float = None) -> int:
+        """Delete expired keys and return how many were removed."""
+        now = now or time.time()
+        with self._lock:
+            expired = [key for key, (expires_at, _) in self._data.items()
+                       if expires_at and expires_at < now]
+            for key in expired:
+                self._data.pop(key, None)
+        return len(expired)
+
+    def _maybe_sweep(self) -> None:
+        now = time.time()
+        if now >= self._next_sweep:
+            self._next_sweep = now + self._sweep_interval
+            self.sweep(now)
+
+
+class RedisSharedStore:
+    """Same interface backed by Redis (or any Redis-compatible server)."""
+
+    def __init__(self, url: str):
+        import redis  # optional dependency, only needed for multi-node mode
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def __getstate__(self):
+        return {"url": self.url}
+
+    def __setstate__(self, state):
+        self.__init__(state["url"])
+
+    def get(self, key: str):
+        raw = self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value, ttl: int = 0) -> None:
+        self._client.set(key, json.dumps(value), ex=ttl or None)
+
+    def incr(self, key: str, ttl: int = 0, amount: int = 1) -> int:
+        pipe = self._client.pipeline()
+        # Create the key with its expiry first so the window rolls over
+        pipe.set(key, 0, ex=ttl or None, nx=True)
+        pipe.incrby(key, amount)
+        return int(pipe.execute()[1])
+
+
+def create_store(redis_url: Optional[str] = None, manager=None):
+    """Pick Redis when a URL is configured, otherwise local shared memory."""
+    redis_url = redis_url or os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisSharedStore(redis_url)
+    return LocalSharedStore(manager)
+
+# ---------------- Cache & Rate Limiter ---------------- #
+
+class SharedCache:
+    """TTL cache for tool and LLM results shared by every worker.
+
+    Hit/miss counters are kept per process so lookups don't pay extra store
+    round trips; run_pool and load_test collect them with take_stats().
+    """
+
+    def __init__(self, store, ttl: int = DEFAULT_CACHE_TTL, namespace: str = "cache"):
+        self.store = store
+        self.ttl = ttl
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    def get(self, key: str):
+        value = self.store.get(self._key(key))
+        if value is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return value
+
+    def set(self, key: str, value) -> None:
+        self.store.set(self._key(key), value, self.ttl)
+
+    def stats(self) -> dict:
+        return merge_cache_stats([{"hits": self.hits, "misses": self.misses}])
+
+    def take_stats(self) -> dict:
+        """Return this process's counters and reset them."""
+        stats = self.stats()
+        self.hits = self.misses = 0
+        return stats
+
+
+def merge_cache_stats(stats_list) -> dict:
+    """Sum hit/miss counters collected from several workers."""
+    hits = sum(stats["hits"] for stats in stats_list)
+    misses = sum(stats["misses"] for stats in stats_list)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
+
+
+class SharedRateLimiter:
+    """Sliding-window limiter whose quota is shared by every worker.
+
+    The rate is estimated from the current and previous fixed windows, with
+    the previous one weighted by how much of it still overlaps the sliding
+    window. This stops a pool from spending ``limit`` calls at the end of one
+    window and another ``limit`` at the start of the next.
+    """
+
+    def __init__(self, store, limits: Optional[dict] = None, window: int = 60,
+                 timeout: float = 120.0):
+        self.store = store
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.window = window
+        self.timeout = timeout
+
+    def try_acquire(self, service: str, now: float = None) -> bool:
+        limit = self.limits.get(service)
+        if not limit:
+            return True
+        now = now or time.time()
+        window_id = int(now // self.window)
+        elapsed = (now % self.window) / self.window
+        key = f"ratelimit:{service}:{window_id}"
+        count = self.store.incr(key, ttl=self.window * 2)
+        previous = self.store.get(f"ratelimit:{service}:{window_id - 1}") or 0
+        if previous * (1 - elapsed) + count <= limit:
+            return True
+        # Give the slot back so refused attempts don't eat into the quota
+        self.store.incr(key, ttl=self.window * 2, amount=-1)
+        return False
+
+    def acquire(self, service: str, timeout: float = None) -> None:
+        """Block until the service has quota left in the sliding window."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.time() + timeout
+        while not self.try_acquire(service):
+            now = time.time()
+            if now >= deadline:
+                raise TimeoutError(f"Rate limit for {service} not available within {timeout}s")
+            # On average one slot frees up every window / limit seconds
+            time.sleep(min(self.window / self.limits[service], deadline - now) + 0.01)
+
+
+def call_tool(service: str, tool_fn, tool_input: str, api_key: str = None,
+              cache: SharedCache = None, limiter: SharedRateLimiter = None) -> str:
+    """Run a tool, reusing cached results and respecting the shared quota."""
+    cache_key = f"{service}:{tool_input.lower().strip()}"
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+    if limiter is not None:
+        try:
+            limiter.acquire(service)
+        except TimeoutError as e:
+            return f"⚠️ {str(e)}"
+    result = tool_fn(tool_input, api_key=api_key)
+    # Don't cache error strings, they may succeed on retry
+    if cache is not None and not result.startswith("⚠️"):
+        cache.set(cache_key, result)
+    return result
+
+# ---------------- Worker Pool (Supervisor) ---------------- #
+
+_worker_cache = None
+_worker_limiter = None
+
+
+def _init_worker(cache: SharedCache, limiter: SharedRateLimiter, attach_agent: bool) -> None:
+    """Pool initializer: wire the shared tier into this worker process."""
+    global _worker_cache, _worker_limiter
+    _worker_cache = cache
+    _worker_limiter = limiter
+    if attach_agent:
+        import agent
+        agent.configure_shared_tier(cache, limiter)
+
+
+def _worker_run_agent(query: str):
+    import agent
+    answer = agent.run_agent(query)
+    # Each worker has its own router; hand its counters back with every task
+    return query, answer, os.getpid(), _worker_cache.take_stats(), agent.router.take_metrics()
+
+
+def run_pool(queries, workers: int = None, store=None,
+             ttl: int = DEFAULT_CACHE_TTL, limits: Optional[dict] = None):
+    """Answer queries with a pool of agent worker processes.
+
+    Returns (results, cache_stats, router_report) where results is a list of
+    (query, answer, worker_pid) tuples in input order, cache_stats covers this
+    run only and router_report is the pool-wide router.summarize_metrics().
+    """
+    from router import merge_metrics, summarize_metrics
+
+    workers = workers or os.cpu_count() or 1
+    store = store or create_store()
+    cache = SharedCache(store, ttl=ttl)
+    limiter = SharedRateLimiter(store, limits)
+    with mp.Pool(workers, initializer=_init_worker,
+                 initargs=(cache, limiter, True)) as pool:
+        outputs = pool.map(_worker_run_agent, queries)
+    results = [(query, answer, pid) for query, answer, pid, _, _ in outputs]
+    cache_stats = merge_cache_stats([output[3] for output in outputs])
+    router_report = summarize_metrics(merge_metrics([output[4] for output in outputs]))
+    return results, cache_stats, router_report
+
+# ---------------- Load Test ---------------- #
+
+LOAD_TEST_SERVICE = "load-test"
+
+# name -> (CPU hash rounds per task, upstream latency in seconds, quota-bound)
+LOAD_TEST_MODES = {
+    # Each task burns CPU and the upstream answers instantly with no quota, so
+    # speedup reflects core scaling and the shared store's own overhead.
+    "cpu": (20_000, 0.0, False),
+    # Upstream sleeps like a network call; processes overlap waits even on
+    # one core, so this shows I/O concurrency rather than core scaling.
+    "io": (0, 0.05, False),
+    # Same as "io" but capped by the shared quota (--limit per --window).
+    "quota": (0, 0.05, True),
+}
+
+
+def stub_upstream(tool_input: str, api_key: str = None, latency: float = 0.0) -> str:
+    """Stand-in for a Tavily/OpenWeather/Groq request: optionally sleeps, then answers."""
+    if latency:
+        time.sleep(latency)
+    return f"Result for {tool_input}"
+
+
+def _burn_cpu(rounds: int) -> bytes:
+    digest = b"seed"
+    for _ in range(rounds):
+        digest = hashlib.sha256(digest).digest()
+    return digest
+
+
+def _load_test_task(args):
+    i, distinct, cpu_rounds, upstream = args
+    _burn_cpu(cpu_rounds)
+    start = time.perf_counter()
+    call_tool(LOAD_TEST_SERVICE, upstream, f"query {i % distinct}",
+              cache=_worker_cache, limiter=_worker_limiter)
+    return time.perf_counter() - start, _worker_cache.take_stats()
+
+
+def load_test(max_workers: int = None, tasks: int = 200, store=None, mode: str = "cpu",
+              distinct: int = 100, limit: int = 60, window: int = 5,
+              upstream=None) -> list:
+    """Measure throughput for 1..max_workers processes (doubling each step).
+
+    Every task goes through call_tool with the real SharedCache and
+    SharedRateLimiter; only the upstream request is stubbed (see
+    LOAD_TEST_MODES). Each step uses a fresh cache namespace so all steps
+    start cold. ``call_ms`` is the mean time spent in call_tool per task,
+    i.e. the shared tier's overhead plus any upstream latency.
+    """
+    cpu_rounds, latency, quota_bound = LOAD_TEST_MODES[mode]
+    upstream = upstream or functools.partial(stub_upstream, latency=latency)
+    limits = {LOAD_TEST_SERVICE: limit} if quota_bound else {}
+    max_workers = max_workers or os.cpu_count() or 1
+    store = store or create_store()
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+
+    rows = []
+    baseline = None
+    for n in counts:
+        cache = SharedCache(store, namespace=f"{LOAD_TEST_SERVICE}:{uuid.uuid4().hex[:8]}")
+        limiter = SharedRateLimiter(store, limits, window=window)
+        with mp.Pool(n, initializer=_init_worker,
+                     initargs=(cache, limiter, False)) as pool:
+            start = time.perf_counter()
+            outputs = pool.map(_load_test_task,
+                               [(i, distinct, cpu_rounds, upstream) for i in range(tasks)],
+                               chunksize=1)
+            elapsed = time.perf_counter() - start
+        stats = merge_cache_stats([task_stats for _, task_stats in outputs])
+        throughput = tasks / elapsed
+        baseline = baseline or throughput
+        speedup = throughput / baseline
+        rows.append({
+            "workers": n,
+            "throughput": throughput,
+            "call_ms": sum(t for t, _ in outputs) / tasks * 1000,
+            "upstream_rate": stats["misses"] / elapsed,
+            "hit_rate": stats["hit_rate"],
+            "speedup": speedup,
+            "efficiency": speedup / n,
+        })
+    return rows
+
+# ---------------- CLI ---------------- #
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the ReAct agent across a worker pool.")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--redis-url", default=None, help="Redis URL for multi-node mode")
+    parser.add_argument("--load-test", action="store_true", help="run the stubbed-upstream scaling benchmark")
+    parser.add_argument("--mode", choices=list(LOAD_TEST_MODES), action="append",
+                        help="load-test case(s) to run (default: cpu and io)")
+    parser.add_argument("--tasks", type=int, default=200, help="tasks per load-test run")
+    parser.add_argument("--limit", type=int, default=60, help="quota mode: upstream calls allowed per window")
+    parser.add_argument("--window", type=int, default=5, help="quota mode: rate-limit window in seconds")
+    args = parser.parse_args()
+
+    store = create_store(args.redis_url)
+
+    if args.load_test:
+        titles = {
+            "cpu": "CPU-bound tasks, instant upstream, no quota (core scaling + shared-tier overhead)",
+            "io": "50 ms upstream, no quota (I/O overlap, not core scaling)",
+            "quota": f"50 ms upstream, shared quota of {args.limit} calls per {args.window}s sliding window",
+        }
+        for mode in args.mode or ["cpu", "io"]:
+            print(f"\n📈 Load test [{mode}]: {titles[mode]}")
+            print(f"{'workers':>8} {'req/s':>8} {'call ms':>8} {'upstream/s':>11} "
+                  f"{'hit rate':>9} {'speedup':>8} {'efficiency':>10}")
+            rows = load_test(args.workers, args.tasks, store, mode=mode,
+                             limit=args.limit, window=args.window)
+            for row in rows:
+                print(f"{row['workers']:>8} {row['throughput']:>8.1f} {row['call_ms']:>8.2f} "
+                      f"{row['upstream_rate']:>11.1f} {row['hit_rate']:>9.0%} "
+                      f"{row['speedup']:>8.2f} {row['efficiency']:>10.0%}")
+        sys.exit(0)
+
+    queries = [line.strip() for line in sys.stdin if line.strip()]
+    results, stats, router_report = run_pool(queries, args.workers, store)
+    for query, answer, pid in results:
+        print(f"[pid {pid}] 🧠 {query}\n💬 {answer}\n")
+    print(f"📦 Shared cache: {stats['hits']} hits / {stats['misses']} misses "
+          f"({stats['hit_rate']:.0%} hit rate)")
+    from router import print_summary
+    print("🔀 Model router (all workers):")
+    print_summary(router_report)
@@ -0,0 +1,110 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from types import SimpleNamespace
+import pytest
+from router import (ModelRouter, MODEL_TIERS, LATENCY_WINDOW, is_confident,
+                    is_valid_decision, is_valid_final_answer, merge_metrics,
+                    summarize_metrics, _decision_of)
+
+class FakeClient:
+    """Stands in for ChatGroq and returns a canned reply."""
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        usage = {"prompt_tokens": 100, "completion_tokens": 20}
+        return SimpleNamespace(content=self.reply, response_metadata={"token_usage": usage})
+
+def make_router(small_reply, large_reply):
+    clients = {"small": FakeClient(small_reply), "large": FakeClient(large_reply)}
+    return ModelRouter(tiers=MODEL_TIERS, clients=clients), clients
+
+#  Test Routing
+def test_small_model_answers_when_valid():
+    """Test that a valid small-model reply is returned without escalating."""
+    router, clients = make_router("Final Answer: Canberra", "Final Answer: Canberra!")
+    assert router.invoke("q", validate=lambda r: "Final Answer:" in r) == ("Final Answer: Canberra", True)
+    assert clients["large"].calls == 0
+    assert router.summary()["escalations"] == 0
+
+def test_escalates_when_validation_fails():
+    """Test that an unparseable small-model reply escalates to the large model."""
+    router, clients = make_router("Canberra I think", "Final Answer: Canberra")
+    assert router.invoke("q", validate=lambda r: "Final Answer:" in r) == ("Final Answer: Canberra", True)
+    summary = router.summary()
+    assert summary["escalations"] == 1
+    assert summary["overall"]["requests"] == 1
+    assert summary["overall"]["p50_ms"] >= summary["large"]["p50_ms"]
+    assert summary["small"]["calls"] == 1 and summary["large"]["calls"] == 1
+    assert summary["large"]["cost_usd"] == pytest.approx((100 * 0.59 + 20 * 0.79) / 1_000_000)
+
+def test_reports_invalid_when_every_tier_fails():
+    """Test that invoke flags a reply that failed validation on all tiers."""
+    router, _ = make_router("Canberra I think", "Probably Canberra")
+    assert router.invoke("q", validate=lambda r: "Final Answer:" in r) == ("Probably Canberra", False)
+
+def test_latency_samples_are_bounded():
+    """Test that latency history doesn't grow without limit."""
+    router, _ = make_router("Final Answer: 8", "Final Answer: 8")
+    for _ in range(LATENCY_WINDOW + 5):
+        router.invoke("q")
+    assert len(router.metrics["small"]["latencies"]) == LATENCY_WINDOW
+    assert len(router.request_latencies) == LATENCY_WINDOW
+    assert router.summary()["overall"]["requests"] == LATENCY_WINDOW + 5
+
+def test_worker_metrics_merge_into_pool_summary():
+    """Test that metrics taken from several worker routers add up."""
+    worker_a, _ = make_router("Final Answer: 8", "Final Answer: 8")
+    worker_b, _ = make_router("eight", "Final Answer: 8")
+    worker_a.invoke("q", validate=is_valid_final_answer)
+    worker_b.invoke("q", validate=is_valid_final_answer)
+    raw = [worker_a.take_metrics(), worker_b.take_metrics()]
+    assert worker_a.summary()["overall"]["requests"] == 0
+    report = summarize_metrics(merge_metrics(raw))
+    assert report["overall"]["requests"] == 2
+    assert report["small"]["calls"] == 2
+    assert report["large"]["calls"] == 1
+    assert report["large"]["model"] == MODEL_TIERS["large"]["model"]
+    assert report["escalations"] == 1
+
+#  Test Confidence Check
+def test_is_confident():
+    """Test that hedging answers fail the confidence check."""
+    assert is_confident("Canberra")
+    assert not is_confident("I'm not sure, but maybe Sydney")
+    assert not is_confident("Sorry, I don't have enough information to answer.")
+    assert not is_confident("")
+
+def test_is_confident_accepts_short_and_hedge_like_answers():
+    """Test that short answers and hedge words mid-answer still pass."""
+    assert is_confident(" 8")
+    assert is_confident("Penguins are unable to fly.")
+    assert is_confident("I can't believe it's Canberra")
+    assert is_confident("There is no information overload here: it's Jupiter")
+
+#  Test ReAct Validators
+def test_is_valid_decision():
+    """Test which ReAct replies are accepted without escalation."""
+    assert is_valid_decision("Final Answer: 8")
+    assert is_valid_decision("Action: Web Search\nAction Input: latest AI news")
+    assert not is_valid_decision("Action: Calculator\nAction Input: 2+2")
+    assert not is_valid_decision("Action: Weather\nAction Input:   ")
+    assert not is_valid_decision("Final Answer: I don't know.")
+    assert not is_valid_decision("The answer is 8")
+
+def test_is_valid_final_answer():
+    """Test which follow-up replies are accepted without escalation."""
+    assert is_valid_final_answer("Final Answer: It's sunny in Paris.")
+    assert not is_valid_final_answer("It's sunny in Paris.")
+    assert not is_valid_final_answer("Final Answer: I'm not sure from these results.")
+
+def test_decision_of():
+    """Test how eval replies are classified into decisions."""
+    assert _decision_of("Final Answer: 12") == "final"
+    assert _decision_of("Action: Web Search\nAction Input: bitcoin price") == "search"
+    assert _decision_of("Action: Weather\nAction Input: Oslo") == "weather"
+    assert _decision_of("Let me think about it") == "invalid"
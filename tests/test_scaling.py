@@ -0,0 +1,131 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import multiprocessing as mp
+import pytest
+import time
+from scaling import (LocalSharedStore, SharedCache, SharedRateLimiter, call_tool, load_test,
+                     merge_cache_stats)
+
+@pytest.fixture(scope="module")
+def manager():
+    with mp.Manager() as m:
+        yield m
+
+def _hammer(store, key, n):
+    for _ in range(n):
+        store.incr(key)
+
+class FakeTool:
+    """Counts upstream calls and returns a canned reply."""
+    def __init__(self, reply="Sunny"):
+        self.reply = reply
+        self.calls = 0
+
+    def __call__(self, tool_input, api_key=None):
+        self.calls += 1
+        return self.reply
+
+def fake_upstream(tool_input, api_key=None):
+    return f"Result for {tool_input}"
+
+#  Test Shared Store
+def test_incr_is_shared_across_processes(manager):
+    """Test that counters stay consistent when several workers increment them."""
+    store = LocalSharedStore(manager)
+    procs = [mp.Process(target=_hammer, args=(store, "counter", 50)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert store.get("counter") == 200
+
+def test_sweep_removes_expired_keys(manager):
+    """Test that expired cache entries and rate-limit windows are deleted."""
+    store = LocalSharedStore(manager)
+    store.set("cache:old", "value", ttl=1)
+    store.incr("ratelimit:groq:1", ttl=1)
+    store.set("cache:fresh", "value", ttl=60)
+    assert store.sweep(now=time.time() + 5) == 2
+    assert store.get("cache:fresh") == "value"
+    assert store.get("ratelimit:groq:1") is None
+
+#  Test Shared Cache
+def test_cache_tracks_hit_rate(manager):
+    """Test that cache hits and misses are counted pool-wide."""
+    cache = SharedCache(LocalSharedStore(manager), ttl=60)
+    assert cache.get("weather:paris") is None
+    cache.set("weather:paris", "Sunny")
+    assert cache.get("weather:paris") == "Sunny"
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+def test_cache_stats_are_per_worker_and_mergeable(manager):
+    """Test that counters stay local to each process and are summed by the supervisor."""
+    store = LocalSharedStore(manager)
+    first = SharedCache(store, ttl=60)
+    first.get("weather:paris")
+    first.set("weather:paris", "Sunny")
+    second = SharedCache(store, ttl=60)
+    assert second.get("weather:paris") == "Sunny"
+    assert first.take_stats() == {"hits": 0, "misses": 1, "hit_rate": 0.0}
+    assert first.stats()["misses"] == 0
+    assert merge_cache_stats([second.take_stats(), {"hits": 2, "misses": 1}]) == \
+        {"hits": 3, "misses": 1, "hit_rate": 0.75}
+
+#  Test Rate Limiter
+def test_rate_limiter_enforces_shared_quota(manager):
+    """Test that the quota is consumed from the shared store."""
+    store = LocalSharedStore(manager)
+    limiter_a = SharedRateLimiter(store, {"groq": 2}, window=3600)
+    limiter_b = SharedRateLimiter(store, {"groq": 2}, window=3600)
+    assert limiter_a.try_acquire("groq")
+    assert limiter_b.try_acquire("groq")
+    assert not limiter_a.try_acquire("groq")
+    assert limiter_b.try_acquire("tavily")  # no limit configured
+
+def test_rate_limiter_blocks_burst_across_window_boundary(manager):
+    """Test that quota spent at the end of a window still counts just after it."""
+    limiter = SharedRateLimiter(LocalSharedStore(manager), {"groq": 10}, window=60)
+    window_id = int(time.time() // 60)
+    end_of_window = window_id * 60 + 59.9
+    for _ in range(10):
+        assert limiter.try_acquire("groq", now=end_of_window)
+    assert not limiter.try_acquire("groq", now=(window_id + 1) * 60 + 0.1)
+    # Halfway through the next window half the previous calls have aged out
+    assert limiter.try_acquire("groq", now=(window_id + 1) * 60 + 31)
+
+#  Test call_tool
+def test_call_tool_uses_cache_and_quota(manager):
+    """Test that repeated calls hit the cache and only misses consume quota."""
+    store = LocalSharedStore(manager)
+    cache = SharedCache(store, ttl=60)
+    limiter = SharedRateLimiter(store, {"openweather": 1}, window=3600, timeout=0)
+    tool = FakeTool()
+    assert call_tool("openweather", tool, "Paris", cache=cache, limiter=limiter) == "Sunny"
+    assert call_tool("openweather", tool, " paris ", cache=cache, limiter=limiter) == "Sunny"
+    assert tool.calls == 1
+    # Quota of 1 is used up, so a new city is refused instead of raising
+    result = call_tool("openweather", tool, "Tokyo", cache=cache, limiter=limiter)
+    assert result.startswith("⚠️") and "openweather" in result
+    assert tool.calls == 1
+
+def test_call_tool_skips_caching_errors(manager):
+    """Test that tool error strings are not cached."""
+    cache = SharedCache(LocalSharedStore(manager), ttl=60)
+    tool = FakeTool("⚠️ Weather API error: 500")
+    call_tool("openweather", tool, "Paris", cache=cache)
+    call_tool("openweather", tool, "Paris", cache=cache)
+    assert tool.calls == 2
+
+#  Test Load Test
+def test_load_test_runs_through_shared_tier(manager):
+    """Test a small load test with a fake upstream across two pool sizes."""
+    rows = load_test(max_workers=2, tasks=20, store=LocalSharedStore(manager),
+                     mode="cpu", distinct=5, upstream=fake_upstream)
+    assert [row["workers"] for row in rows] == [1, 2]
+    # One worker sees each of the 5 distinct queries miss exactly once;
+    # two workers may both miss the same query concurrently
+    assert rows[0]["hit_rate"] == 0.75
+    assert 0 < rows[1]["hit_rate"] <= 0.75
+    assert all(row["throughput"] > 0 for row in rows)